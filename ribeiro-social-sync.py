@@ -13,17 +13,25 @@
 #
 
 from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import chain
 import logging as log
 import requests
-import html2text
+from requests.adapters import HTTPAdapter
 import twitter as Twitter
 from mastodon import Mastodon
 from docopt import docopt
 from urllib.parse import urlparse
+from html.parser import HTMLParser
 
+import functools
 import pickle
+import pickletools
+import io
 import fcntl
 import json
+import time
 import re
 import os
 
@@ -52,6 +60,106 @@ Options:
 
 VERSION = "2.0.0"
 
+# re-verify the cached account information every week
+ACCOUNT_TTL = 7 * 24 * 60 * 60
+
+# page sizes for fetching timelines (the API maxima)
+TOOTS_PER_PAGE = 40
+TWEETS_PER_PAGE = 200
+
+# only links on these hosts are expanded; others are considered canonical
+SHORTENER_HOSTS = frozenset(
+    {"t.co", "bit.ly", "ow.ly", "goo.gl", "tinyurl.com", "buff.ly", "is.gd"}
+)
+
+# default number of stored twoots (override with "max_twoots" in the config)
+MAX_TWOOTS = 1000
+
+# number of expanded links remembered across runs
+MAX_EXPANDED_URLS = 1000
+
+# size of a segment for chunked media upload (Twitter accepts up to 5 MB)
+MEDIA_CHUNK_SIZE = 4 * 1024 * 1024
+
+# patterns for text processing
+MENTION_RE = re.compile(r"([\s\n(]@)([_\w\d])")
+TRAIL_WS_RE = re.compile(r"[ \t]+\n")
+URL_RE = re.compile(r"https?://[^\s]+")
+HTTP_PREFIX_RE = re.compile(r"https?://")
+
+
+@functools.lru_cache(maxsize=32)
+def compile_words(words):
+    """Compile a pattern matching any of `words` (a tuple of str).
+
+    Longer words come first so that a word is never cut by its prefix.
+    """
+    return re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
+
+
+class TootHTMLParser(HTMLParser):
+    """Extract the plain text from the HTML content of a toot.
+
+    Text (including line breaks and spaces) is kept as is, paragraphs are
+    separated by a blank line, hashtag links are rendered as `#name` and other
+    links as their raw href.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.href = None
+        self.label = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "br":
+            self.handle_data("\n")
+        elif tag == "p" and self.parts:
+            self.parts.append("\n\n")
+        elif tag == "a":
+            self.href = dict(attrs).get("href") or ""
+            self.label = []
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.href is not None:
+            label = "".join(self.label)
+            if label.startswith("#") or not self.href:
+                self.parts.append(label)
+            else:
+                self.parts.append(self.href)
+            self.href = None
+
+    def handle_data(self, data):
+        if self.href is not None:
+            self.label.append(data)
+        else:
+            self.parts.append(data)
+
+
+def assemble_tweet(toot_text, toot_reduced, toot_links, permalink):
+    """Assemble the tweet text from the pieces of a toot.
+
+    Args:
+        toot_text (str): the pre-processed toot text
+        toot_reduced (str): `toot_text` without links
+        toot_links (str): the first link in `toot_text` (or empty)
+        permalink (str): the url of the toot
+
+    Returns:
+        str: the tweet text
+    """
+    # it starts at 253 because the permalink and then basically hack that
+    # down another 23 chars if there is another link since Twitter will
+    # handle this reduction for links
+    string_len = 253
+    if len(toot_links) > 0:
+        string_len = 253 - 23
+
+    toot_sliced = (toot_reduced[:string_len] + "...") if len(toot_text) > string_len else toot_reduced
+
+    # oh a just hacky christmas special
+    return f"{toot_sliced} {toot_links} {permalink}"
+
 
 class Twoot:
     def __init__(self, profile="default", setup=False):
@@ -76,17 +184,19 @@ class Twoot:
         )
 
         tw = self.config["twitter"]
-        t_auth = Twitter.OAuth(
+        self.twitter_auth = Twitter.OAuth(
             tw["access_token"],
             tw["access_token_secret"],
             tw["consumer_key"],
             tw["consumer_secret"],
         )
-        self.twitter = Twitter.Twitter(auth=t_auth)
-        self.twitter_upload = Twitter.Twitter(domain="upload.twitter.com", auth=t_auth)
+        self.twitter = Twitter.Twitter(auth=self.twitter_auth)
 
         # data
-        self.twoots = []
+        self.max_twoots = self.config.get("max_twoots", MAX_TWOOTS)
+        self.twoots = deque(maxlen=self.max_twoots)
+        self.toot_to_tweet = {}
+        self.dirty = False
 
         if os.path.isfile(self.data_file):
             logger.debug("Loading sync cache from {}".format(self.data_file))
@@ -96,48 +206,86 @@ class Twoot:
             logger.debug("No data file found; initialzing")
             self.data = {"twoots": []}
 
-        # fetch self account information
-        if not self.data.get("mastodon_account", False):
+        # expanded links, least recently used first
+        self.expanded_urls = self.data.get("expanded_urls", {})
+
+        # fetch self account information (only if not cached or stale)
+        verified = False
+        stale = time.time() - self.data.get("account_verified_at", 0) > ACCOUNT_TTL
+
+        if stale or not self.data.get("mastodon_account", False):
             ms_avc = self.mastodon.account_verify_credentials
             try:
                 logger.debug("Fetching Mastodon account information (verify credentials)")
                 self.data["mastodon_account"] = ms_avc()
+                verified = True
             except Exception as e:
-                logger.exception("Failed to verify credentials for Mastodon: {}".format(e))
-                logger.critical("Unable to continue; abort!")
-                raise
-
-        if not self.data.get("twitter_account", False):
+                # keep using the cached account if any
+                if self.data.get("mastodon_account", False):
+                    logger.warn("Failed to re-verify credentials for Mastodon; using cached: {}".format(e))
+                else:
+                    logger.exception("Failed to verify credentials for Mastodon: {}".format(e))
+                    logger.critical("Unable to continue; abort!")
+                    raise
+
+        if stale or not self.data.get("twitter_account", False):
             tw_avc = self.twitter.account.verify_credentials
             try:
                 logger.debug("Fetching Twitter account information (verify credentials)")
                 self.data["twitter_account"] = tw_avc()
+                verified = True
             except Exception as e:
-                logger.exception("Failed to verify credentials for Twitter: {}".format(e))
-                logger.critical("Unable to continue; abort!")
-                raise
-
-        # save data anyway
-        with open(self.data_file, "wb") as f:
-            pickle.dump(self.data, f)
+                # keep using the cached account if any
+                if self.data.get("twitter_account", False):
+                    logger.warn("Failed to re-verify credentials for Twitter; using cached: {}".format(e))
+                else:
+                    logger.exception("Failed to verify credentials for Twitter: {}".format(e))
+                    logger.critical("Unable to continue; abort!")
+                    raise
+
+        # save data (at the end of the run) only if the account information is updated
+        if verified:
+            self.data["account_verified_at"] = time.time()
+            self.dirty = True
+
+    @functools.cached_property
+    def twitter_upload(self):
+        """Twitter client for media upload (created on first use)."""
+        return Twitter.Twitter(domain="upload.twitter.com", auth=self.twitter_auth)
+
+    @functools.cached_property
+    def http(self):
+        """Shared HTTP(S) session for links and media (created on first use)."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def __write_data(self):
+        """Write the data to the data file.
+
+        The pickle is optimized before writing; the data file is read at the
+        beginning of every run but written at most once, so a slower write for
+        a faster load is a good trade. The file is replaced atomically so that
+        a crash while writing never leaves a broken data file behind.
+        """
+        buf = pickle.dumps(self.data, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_file = self.data_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(pickletools.optimize(buf))
+            f.flush()
+            os.fsync(f.fileno())
 
-        # utility
-        self.html2text = html2text.HTML2Text()
-        self.html2text.body_width = 0
+        os.replace(tmp_file, self.data_file)
 
     def __update_last_id(self, key, value):
-        """Update the last id (last_toot or last_tweet) in the data file."""
-        # load the latest data
-        if os.path.isfile(self.data_file):
-            with open(self.data_file, "rb") as f:
-                data = pickle.load(f)
-        else:
-            data = {"twoots": []}
+        """Update the last id (last_toot or last_tweet) in the data.
 
-        # update the target
-        data[key] = value
-        with open(self.data_file, "wb") as f:
-            pickle.dump(data, f)
+        The data file itself is written once at the end of `run`.
+        """
+        self.data[key] = value
+        self.dirty = True
 
     def get_new_toots(self, dry_run=False, update=False):
         """Get new toots of the author.
@@ -163,7 +311,13 @@ class Twoot:
             # get toots for sync
             if last_id:
                 logger.debug("Getting new toots for sync")
-                r = self.mastodon.account_statuses(my_id, since_id=last_id)
+                r = self.mastodon.account_statuses(my_id, since_id=last_id, limit=TOOTS_PER_PAGE)
+                page = r
+
+                # a full page may mean more toots; follow until last_id is reached
+                while len(page) >= TOOTS_PER_PAGE and page[-1]["id"] > last_id:
+                    page = self.mastodon.fetch_next(page) or []
+                    r += [t for t in page if t["id"] > last_id]
 
                 logger.debug("Number of new toots: {}".format(len(r)))
                 res = r
@@ -171,13 +325,13 @@ class Twoot:
             # get toots only for updating last_toot
             else:
                 logger.debug("Getting new toots only for fetching information")
-                r = self.mastodon.account_statuses(my_id)
+                r = self.mastodon.account_statuses(my_id, limit=1)
 
             # update the last toot ID
             if len(r) > 0:
                 new_last_id = r[0]["id"]  # r[0] is the latest
 
-                # update the data file immediately
+                # update the data (saved at the end of the run)
                 if not dry_run or update:
                     logger.debug("Updating the last toot: {}".format(new_last_id))
                     self.__update_last_id("last_toot", new_last_id)
@@ -209,7 +363,9 @@ class Twoot:
             # get tweets for sync
             if last_id:
                 logger.debug("Getting new tweets for sync")
-                r = self.twitter.statuses.user_timeline(user_id=my_id, since_id=last_id, tweet_mode="extended")
+                r = self.twitter.statuses.user_timeline(
+                    user_id=my_id, since_id=last_id, count=TWEETS_PER_PAGE, tweet_mode="extended"
+                )
 
                 logger.debug("Number of new tweets: {}".format(len(r)))
                 res = r
@@ -217,13 +373,13 @@ class Twoot:
             # get tweets only for updating last_tweet
             else:
                 logger.debug("Getting new tweets only for fetching information")
-                r = self.twitter.statuses.user_timeline(user_id=my_id, tweet_mode="extended")
+                r = self.twitter.statuses.user_timeline(user_id=my_id, count=1, tweet_mode="extended")
 
             # update the last tweet ID
             if len(r) > 0:
                 new_last_id = r[0]["id"]  # r[0] is the latest
 
-                # update the data file immediately
+                # update the data (saved at the end of the run)
                 if not dry_run or update:
                     logger.debug("Updating the last tweet: {}".format(new_last_id))
                     self.__update_last_id("last_tweet", new_last_id)
@@ -242,7 +398,8 @@ class Twoot:
         """
         twoot = {"toot_id": toot_id, "tweet_id": tweet_id}
         logger.debug("Storing a twoot: {}".format(twoot))
-        self.twoots.insert(0, twoot)
+        self.twoots.appendleft(twoot)
+        self.toot_to_tweet[toot_id] = tweet_id
 
     def __find_paired_tweet(self, toot_id):
         """Returns the id of paired tweet of `toot_id`.
@@ -253,12 +410,7 @@ class Twoot:
         Returns:
             int: Id of the paired tweet of `toot_id`
         """
-        for t in self.twoots + self.data["twoots"]:
-            if t["toot_id"] == toot_id:
-                tweet_id = t["tweet_id"]
-                return tweet_id
-
-        return None
+        return self.toot_to_tweet.get(toot_id)
 
     def __html2text(self, html):
         """Convert html to text.
@@ -274,26 +426,12 @@ class Twoot:
         Returns:
             str: the plain text
         """
-        # prevent removing line break, indents, and char escapes
-        escapeable = [
-            ("\n", "<br>"),  # line break
-            (" ", "&nbsp;"),  # space
-            ("\\", "&#92;"),  # backslash
-            ("+", "&#43;"),  # plus
-            ("-", "&#45;"),  # hyphen
-            (".", "&#46;"),  # period
-        ]
-        for p in escapeable:
-            html = html.replace(p[0], p[1])
-
-        # basically, trust html2text
-        text = self.html2text.handle(html).strip()
-
-        # treat links and hashtags
-        text = re.sub(r"\[#(.*?)\]\(.*?\)", r"#\1", text)
-        text = re.sub(r"\[.*?\]\((.*?)\)", r"\1", text)
+        # a single pass over the DOM; links and hashtags are treated inside
+        parser = TootHTMLParser()
+        parser.feed(html)
+        parser.close()
 
-        return text
+        return "".join(parser.parts).strip()
 
     def __pre_process(self, text, remove_words=[]):
         """Format a text nicely before posting.
@@ -318,33 +456,55 @@ class Twoot:
 
         # expand links
         links = [w for w in text.split() if urlparse(w.strip()).scheme]
+        links = [link for link in links if HTTP_PREFIX_RE.match(link)]
+        links = [link for link in links if urlparse(link).hostname in SHORTENER_HOSTS]
 
-        for link in links:
-            # check the link
-            if not re.match(r"http(s|)://", link):
-                continue
+        if links:
+            with ThreadPoolExecutor(max_workers=8) as ex:
+                urls = list(ex.map(self.__expand_link, links))
 
-            # expand link with HTTP(S) HEAD request
-            try:
-                r = requests.head(link)
-                url = r.headers.get("location", link)
+            for link, url in zip(links, urls):
                 text = text.replace(link, url)
 
-            except Exception as e:
-                logger.exception("HTTP(S) HEAD request failed: {}".format(e))
-
         # remove specified words
-        for w in remove_words:
-            text = text.replace(w, "")
+        if remove_words:
+            text = compile_words(tuple(remove_words)).sub("", text)
 
         # prevent mentions
-        text = re.sub(r"([\s\n(]@)([_\w\d])", r"\1.\2", text)
+        text = MENTION_RE.sub(r"\1.\2", text)
 
         # no tailing spaces
-        text = re.sub(r"[ \t]+\n", r"\n", text).strip()
+        text = TRAIL_WS_RE.sub(r"\n", text).strip()
 
         return text
 
+    def __expand_link(self, link):
+        """Expand a shorten link with HTTP(S) HEAD request.
+
+        Results are remembered (and saved with the data) so the same link is
+        never requested twice.
+
+        Args:
+            link (str): the link
+
+        Returns:
+            str: the expanded link (or `link` itself if failed)
+        """
+        # move a known link to the most recently used end
+        url = self.expanded_urls.pop(link, None)
+
+        if url is None:
+            try:
+                r = self.http.head(link, allow_redirects=False, timeout=5)
+                url = r.headers.get("location", link)
+
+            except Exception as e:
+                logger.exception("HTTP(S) HEAD request failed: {}".format(e))
+                return link
+
+        self.expanded_urls[link] = url
+        return url
+
     def __download_image(self, url):
         """Download an image from `url`.
 
@@ -355,7 +515,7 @@ class Twoot:
             raw binary data
             str: content type
         """
-        r = requests.get(url)
+        r = self.http.get(url)
         if r.status_code != 200:
             logger.warn("Failed to get an image from {}".format(url))
             return None
@@ -368,26 +528,40 @@ class Twoot:
         return r.content, c_type
 
     def __download_video(self, url):
-        """Download a video from `url`.
+        """Start downloading a video from `url`.
+
+        The body is streamed rather than loaded into memory; read it from the
+        returned file-like object.
 
         Args:
             url (str): the video url
 
         Returns:
-            raw binary data
+            file-like object of raw binary data
             str: content type
+            int: size in bytes
         """
-        r = requests.get(url)
+        # ask for an uncompressed body so the raw stream is the video itself
+        r = self.http.get(url, stream=True, headers={"Accept-Encoding": "identity"})
         if r.status_code != 200:
             logger.warn("Failed to get a video from {}".format(url))
+            r.close()
             return None
 
         c_type = r.headers["content-type"]
         if "video" not in c_type:
             logger.warn("Data from {} is not a video".format(url))
+            r.close()
             return None
 
-        return r.content, c_type
+        # the size is required beforehand; fall back to loading if unknown or
+        # the body is encoded anyway
+        if "content-length" not in r.headers or "content-encoding" in r.headers:
+            video = r.content
+            r.close()
+            return io.BytesIO(video), c_type, len(video)
+
+        return r.raw, c_type, int(r.headers["content-length"])
 
     def __post_media_to_twitter(self, media):
         """Get actual data of `media` from Mastodon and post it to Twitter.
@@ -417,19 +591,31 @@ class Twoot:
                 return None
 
         elif media_type == "gifv":
-            video, mime_type = self.__download_video(media["url"])
+            video, mime_type, video_size = self.__download_video(media["url"])
 
             try:
                 # init
                 init_res = self.twitter_upload.media.upload(
-                    command="INIT", total_bytes=len(video), media_type=mime_type
+                    command="INIT", total_bytes=video_size, media_type=mime_type
                 )
                 media_id = init_res["media_id_string"]
 
-                # append
-                append_res = self.twitter_upload.media.upload(
-                    command="APPEND", media_id=media_id, media=video, segment_index=0
-                )
+                # append; segments are sent in parallel while the rest is
+                # still downloading, keeping only a few of them in memory
+                def append(index, chunk):
+                    return self.twitter_upload.media.upload(
+                        command="APPEND", media_id=media_id, media=chunk, segment_index=index
+                    )
+
+                pending = []
+                with ThreadPoolExecutor(max_workers=4) as ex:
+                    for index, chunk in enumerate(iter(lambda: video.read(MEDIA_CHUNK_SIZE), b"")):
+                        pending.append(ex.submit(append, index, chunk))
+                        if len(pending) >= 4:
+                            pending.pop(0).result()
+
+                    for f in pending:
+                        f.result()
 
                 # finalize
                 r = self.twitter_upload.media.upload(command="FINALIZE", media_id=media_id)
@@ -441,6 +627,9 @@ class Twoot:
                 logger.exception("Failed to post an image: {}".format(e))
                 return None
 
+            finally:
+                video.close()
+
         else:
             logger.warn("Unknown media type found. Skipping.")
 
@@ -494,13 +683,12 @@ class Twoot:
         """
         my_id = self.data["mastodon_account"]["id"]
         toot_id = toot["id"]
-        synced_toots = [t["toot_id"] for t in self.twoots + self.data["twoots"]]
 
         def debug_skip(tt_id, reason):
             logger.debug("Skipping a toot (id: {}) because {}".format(tt_id, reason))
 
         # skip if already forwarded
-        if toot_id in synced_toots:
+        if toot_id in self.toot_to_tweet:
             debug_skip(toot_id, "it is already forwarded")
             return
 
@@ -525,7 +713,7 @@ class Twoot:
             boosted_toot_id = boosted_toot["id"]
 
             # if self BT of a synced toot, exec RT on the paired tweet
-            if boosted_toot_id in synced_toots:
+            if boosted_toot_id in self.toot_to_tweet:
                 target_tweet_id = self.__find_paired_tweet(boosted_toot_id)
                 logger.debug("Retweet a tweet (id: {})".format(target_tweet_id))
 
@@ -554,7 +742,8 @@ class Twoot:
             media_num = len(mastodon_media)
 
         else:
-            twitter_media = [self.__post_media_to_twitter(m) for m in mastodon_media]
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                twitter_media = list(ex.map(self.__post_media_to_twitter, mastodon_media))
             media_ids = [m["media_id_string"] for m in twitter_media if m is not None]
             media_num = len(media_ids)
 
@@ -562,23 +751,11 @@ class Twoot:
         # links, cut'em out so I can count a little and ellipse the text, not
         # the link" and then piece it back together
         toot_text = self.__pre_process(toot["content"])
-        toot_links = ""
-        toot_search = re.search("(?P<url>https?://[^\s]+)", toot_text)
-        if toot_search is not None:
-            toot_links = toot_search.group("url")
-        toot_reduced = re.sub("(?P<url>https?://[^\s]+)", "", toot_text)
+        toot_search = URL_RE.search(toot_text)
+        toot_links = toot_search.group(0) if toot_search else ""
+        toot_reduced = URL_RE.sub("", toot_text)
 
-        # it starts at 253 because the permalink and then basically hack that
-        # down another 23 chars if there is another link since Twitter will
-        # handle this reduction for links
-        string_len = 253
-        if len(toot_links) > 0:
-            string_len = 253 - 23
-
-        toot_sliced = (toot_reduced[:string_len] + "...") if len(toot_text) > string_len else toot_reduced
-
-        # oh a just hacky christmas special
-        text = f"{toot_sliced} {toot_links} {toot['url']}"
+        text = assemble_tweet(toot_text, toot_reduced, toot_links, toot["url"])
 
         # try to create a tweet
         if media_num > 0:
@@ -589,7 +766,7 @@ class Twoot:
         if not dry_run:
             # NOTE: these branches are for calculation efficiency
             # if the toot is in a thread and in sync, copy as a thread
-            if in_reply_to_toot_id in synced_toots:
+            if in_reply_to_toot_id in self.toot_to_tweet:
                 r = self.__tweet(
                     text,
                     in_reply_to_id=self.__find_paired_tweet(in_reply_to_toot_id),
@@ -608,6 +785,9 @@ class Twoot:
                 logger.info("Forwarded a toot (id: {}) as a tweet (id: {})".format(toot_id, tweet_id))
 
     def toots2tweets(self, toots, dry_run=False):
+        # index the stored twoots by toot id for quick lookups
+        self.toot_to_tweet = {t["toot_id"]: t["tweet_id"] for t in chain(self.twoots, self.data["twoots"])}
+
         # process from the oldest one
         for t in reversed(toots):
             # NOTE: only under development
@@ -617,20 +797,20 @@ class Twoot:
             self.create_tweet_from_toot(t, dry_run)
 
     def __save_data(self):
-        """Save up-to-dated data (twoots) to the data file."""
-        # load the latest data
-        with open(self.data_file, "rb") as f:
-            data = pickle.load(f)
+        """Save up-to-dated data (twoots and last ids) to the data file."""
+        # concat the new twoots to data, keeping the number of stored twoots
+        # less than max_twoots
+        self.data["twoots"] = list(self.twoots) + self.data["twoots"][: self.max_twoots - len(self.twoots)]
+        self.twoots.clear()
 
-        # concat the new twoots to data
-        data["twoots"] = self.twoots + data["twoots"]
-
-        # keep the number of stored twoots less than max_twoots
-        data["twoots"] = data["twoots"][:1000]
+        # keep only the recently used expanded links
+        recent = list(self.expanded_urls.items())[-MAX_EXPANDED_URLS:]
+        self.expanded_urls = self.data["expanded_urls"] = dict(recent)
 
         # save data
-        with open(self.data_file, "wb") as f:
-            pickle.dump(data, f)
+        self.__write_data()
+
+        self.dirty = False
 
     def run(self, dry_run=False, update=False):
         if dry_run:
@@ -644,18 +824,26 @@ class Twoot:
 
         # tweets -> toots
         toots = self.get_new_toots(dry_run, update)
-        if not self.setup:
-            self.toots2tweets(toots, dry_run)
 
-        # toots -> tweets
-        # tweets = self.get_new_tweets(dry_run, update)
-        # if not self.setup:
-        #     self.tweets2toots(tweets, dry_run)
+        # nothing to sync or save
+        if not toots and not self.dirty:
+            logger.debug("No new toots; nothing to do")
+
+        else:
+            try:
+                if not self.setup:
+                    self.toots2tweets(toots, dry_run)
+
+                # toots -> tweets
+                # tweets = self.get_new_tweets(dry_run, update)
+                # if not self.setup:
+                #     self.tweets2toots(tweets, dry_run)
 
-        # update the entire data
-        if len(self.twoots) > 0:
-            logger.debug("Saving up-to-dated data to {}".format(self.data_file))
-            self.__save_data()
+            # update the entire data, even if the sync is aborted halfway
+            finally:
+                if (not dry_run or update) and (len(self.twoots) > 0 or self.dirty):
+                    logger.debug("Saving up-to-dated data to {}".format(self.data_file))
+                    self.__save_data()
 
         # show current status for debugging
         logger.debug("Number of stored twoots: {}".format(len(self.data["twoots"])))
@@ -714,7 +902,7 @@ def main():
 
     # make sure to be a singleton
     lf = os.path.expanduser("~/." + PROG_NAME + "/lockfile.lock")
-    with open(lf, "w") as f:
+    with open(lf, "a") as f:
         try:
             fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
 
@@ -8,6 +8,6 @@ setup(
     author='Justin Ribeiro',
     author_email='justin@justinribeiro.com',
     install_requires=[
-        'docopt', 'Mastodon.py', 'twitter', 'html2text', 'requests'
+        'docopt', 'Mastodon.py', 'twitter', 'requests'
     ],
     url='https://github.com/justinribeiro/ribeiro-social-sync.py')